@@ -95,6 +95,7 @@ class BacktestRequest(BaseHedgeFundRequest):
     start_date: str
     end_date: str
     initial_capital: float = 100000.0
+    agent_frequency: int = Field(default=1, ge=1)
 
 
 class BacktestDayResult(BaseModel):
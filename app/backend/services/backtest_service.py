@@ -1,20 +1,29 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import pandas as pd
 import numpy as np
 from typing import Callable, Dict, List, Optional, Any
 import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from src.tools.api import (
     get_company_news,
-    get_price_data,
     get_prices,
     get_financial_metrics,
     get_insider_trades,
+    prices_to_df,
 )
 from app.backend.services.graph import run_graph_async, parse_hedge_fund_response
 from app.backend.services.portfolio import create_portfolio
 
+# Actions that change the portfolio; anything else (e.g. "hold") is a no-op
+TRADE_ACTIONS = frozenset({"buy", "sell", "short", "cover"})
+
+# Columns tracked for each day in the portfolio value history
+PORTFOLIO_VALUE_COLUMNS = ["Portfolio Value", "Long Exposure", "Short Exposure", "Gross Exposure", "Net Exposure", "Long/Short Ratio"]
+
+
 class BacktestService:
     """
     Core backtesting service that focuses purely on backtesting logic.
@@ -32,6 +41,7 @@ class BacktestService:
         model_name: str = "gpt-4.1",
         model_provider: str = "OpenAI",
         request: dict = {},
+        agent_frequency: int = 1,
     ):
         """
         Initialize the backtest service.
@@ -45,6 +55,7 @@ class BacktestService:
         :param model_name: Which LLM model name to use.
         :param model_provider: Which LLM provider.
         :param request: Request object containing API keys and other metadata.
+        :param agent_frequency: Run the graph every N trading days and hold positions in between (1 = every day).
         """
         self.graph = graph
         self.portfolio = portfolio
@@ -55,7 +66,13 @@ class BacktestService:
         self.model_name = model_name
         self.model_provider = model_provider
         self.request = request
-        self.portfolio_values = []
+        if agent_frequency < 1:
+            raise ValueError(f"agent_frequency must be at least 1, got {agent_frequency}")
+        self.agent_frequency = agent_frequency
+        # Portfolio value history, preallocated per trading day when the backtest starts
+        self._allocate_portfolio_values(0)
+        # Daily price frames per ticker, populated by prefetch_data
+        self._prices = {}
 
     def execute_trade(self, ticker: str, action: str, quantity: float, current_price: float) -> int:
         """
@@ -201,50 +218,106 @@ class BacktestService:
 
         return 0
 
-    def calculate_portfolio_value(self, current_prices: Dict[str, float]) -> float:
-        """Calculate total portfolio value."""
-        total_value = self.portfolio["cash"]
+    def execute_trades(self, decisions: Dict[str, Any], current_prices: Dict[str, float]) -> Dict[str, int]:
+        """
+        Execute one date's decisions for every ticker and return the executed quantity per ticker.
+        Trades run sequentially in ticker order because each one changes the cash available to the next;
+        tickers without a trading action are skipped without touching the portfolio.
+        """
+        executed_trades = dict.fromkeys(self.tickers, 0)
+        for ticker in self.tickers:
+            decision = decisions.get(ticker)
+            if not decision:
+                continue
+            action = decision.get("action", "hold")
+            if action not in TRADE_ACTIONS:
+                continue
+            executed_trades[ticker] = self.execute_trade(ticker, action, decision.get("quantity", 0), current_prices[ticker])
+        return executed_trades
 
+    def calculate_exposures(self, current_prices: Dict[str, float]) -> tuple[float, float]:
+        """Return (long_exposure, short_exposure) across all tickers, walking the positions once."""
+        long_exposure = 0.0
+        short_exposure = 0.0
         for ticker in self.tickers:
             position = self.portfolio["positions"][ticker]
             price = current_prices[ticker]
+            long_exposure += position["long"] * price
+            short_exposure += position["short"] * price
+        return long_exposure, short_exposure
 
-            # Long position value
-            long_value = position["long"] * price
-            total_value += long_value
-
-            # Short position unrealized PnL
-            if position["short"] > 0:
-                total_value -= position["short"] * price
-
-        return total_value
+    def calculate_portfolio_value(self, current_prices: Dict[str, float]) -> float:
+        """Calculate total portfolio value."""
+        long_exposure, short_exposure = self.calculate_exposures(current_prices)
+        return self.portfolio["cash"] + long_exposure - short_exposure
 
     def prefetch_data(self):
         """Pre-fetch all data needed for the backtest period."""
         end_date_dt = datetime.strptime(self.end_date, "%Y-%m-%d")
-        start_date_dt = end_date_dt - relativedelta(years=1)
+        start_date_dt = min(end_date_dt - relativedelta(years=1), datetime.strptime(self.start_date, "%Y-%m-%d"))
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
         api_key = self.request.api_keys.get("FINANCIAL_DATASETS_API_KEY")
 
-        for ticker in self.tickers:
-            get_prices(ticker, start_date_str, self.end_date, api_key=api_key)
-            get_financial_metrics(ticker, self.end_date, limit=10, api_key=api_key)
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000, api_key=api_key)
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000, api_key=api_key)
+        # The fetches are network-bound, so run them concurrently across all tickers
+        with ThreadPoolExecutor(max_workers=max(1, min(16, 4 * len(self.tickers)))) as executor:
+            price_futures = {ticker: executor.submit(get_prices, ticker, start_date_str, self.end_date, api_key=api_key) for ticker in self.tickers}
+            other_futures = []
+            for ticker in self.tickers:
+                other_futures.append(executor.submit(get_financial_metrics, ticker, self.end_date, limit=10, api_key=api_key))
+                other_futures.append(executor.submit(get_insider_trades, ticker, self.end_date, start_date=self.start_date, limit=1000, api_key=api_key))
+                other_futures.append(executor.submit(get_company_news, ticker, self.end_date, start_date=self.start_date, limit=1000, api_key=api_key))
+
+        # Re-raise any fetch error, then keep prices indexed by date so the
+        # backtest loop can slice them per day
+        for future in other_futures:
+            future.result()
+        for ticker, future in price_futures.items():
+            prices = future.result()
+            self._prices[ticker] = prices_to_df(prices) if prices else pd.DataFrame(columns=["close"], index=pd.DatetimeIndex([]))
+
+    def _allocate_portfolio_values(self, capacity: int):
+        """Start an empty portfolio value history with room for `capacity` days."""
+        self._value_dates = np.empty(capacity, dtype="datetime64[ns]")
+        self._values = np.full((capacity, len(PORTFOLIO_VALUE_COLUMNS)), np.nan)
+        self._value_count = 0
+
+    def _record_portfolio_value(self, date, *values):
+        """Store one day's portfolio value (and optionally its exposures) in the preallocated history."""
+        self._value_dates[self._value_count] = date
+        self._values[self._value_count, : len(values)] = values
+        self._value_count += 1
+
+    def _portfolio_values_df(self) -> pd.DataFrame:
+        """Return the portfolio value history recorded so far, indexed by date."""
+        n = self._value_count
+        return pd.DataFrame(self._values[:n], index=pd.DatetimeIndex(self._value_dates[:n], name="Date"), columns=PORTFOLIO_VALUE_COLUMNS)
+
+    def _portfolio_values_records(self) -> List[Dict[str, Any]]:
+        """Return the portfolio value history as records, with missing values as None so they serialise to JSON."""
+        n = self._value_count
+        return [
+            {"Date": pd.Timestamp(date), **{column: None if np.isnan(value) else float(value) for column, value in zip(PORTFOLIO_VALUE_COLUMNS, row)}}
+            for date, row in zip(self._value_dates[:n], self._values[:n])
+        ]
+
+    @property
+    def portfolio_values(self) -> List[Dict[str, Any]]:
+        """Portfolio value history as JSON-safe records, one per recorded day."""
+        return self._portfolio_values_records()
 
     def _update_performance_metrics(self, performance_metrics: Dict[str, Any]):
         """Update performance metrics using daily returns."""
-        values_df = pd.DataFrame(self.portfolio_values).set_index("Date")
-        values_df["Daily Return"] = values_df["Portfolio Value"].pct_change()
-        clean_returns = values_df["Daily Return"].dropna()
+        # Work on the raw value array rather than building a DataFrame every day
+        values = self._values[: self._value_count, 0]
+        clean_returns = values[1:] / values[:-1] - 1.0
 
-        if len(clean_returns) < 2:
+        if clean_returns.size < 2:
             return
 
         daily_risk_free_rate = 0.0434 / 252
         excess_returns = clean_returns - daily_risk_free_rate
         mean_excess_return = excess_returns.mean()
-        std_excess_return = excess_returns.std()
+        std_excess_return = excess_returns.std(ddof=1)
 
         # Sharpe ratio
         if std_excess_return > 1e-12:
@@ -254,8 +327,9 @@ class BacktestService:
 
         # Sortino ratio
         negative_returns = excess_returns[excess_returns < 0]
-        if len(negative_returns) > 0:
-            downside_std = negative_returns.std()
+        if negative_returns.size > 0:
+            # A single negative return has no sample std (NaN), same as pandas
+            downside_std = negative_returns.std(ddof=1) if negative_returns.size > 1 else np.nan
             if downside_std > 1e-12:
                 performance_metrics["sortino_ratio"] = np.sqrt(252) * (mean_excess_return / downside_std)
             else:
@@ -264,15 +338,15 @@ class BacktestService:
             performance_metrics["sortino_ratio"] = None if mean_excess_return > 0 else 0
 
         # Maximum drawdown
-        rolling_max = values_df["Portfolio Value"].cummax()
-        drawdown = (values_df["Portfolio Value"] - rolling_max) / rolling_max
+        rolling_max = np.maximum.accumulate(values)
+        drawdown = (values - rolling_max) / rolling_max
 
-        if len(drawdown) > 0:
+        if drawdown.size > 0:
             min_drawdown = drawdown.min()
             performance_metrics["max_drawdown"] = min_drawdown * 100
 
             if min_drawdown < 0:
-                performance_metrics["max_drawdown_date"] = drawdown.idxmin().strftime("%Y-%m-%d")
+                performance_metrics["max_drawdown_date"] = pd.Timestamp(self._value_dates[drawdown.argmin()]).strftime("%Y-%m-%d")
             else:
                 performance_metrics["max_drawdown_date"] = None
         else:
@@ -297,24 +371,29 @@ class BacktestService:
             "net_exposure": 0.0,
         }
 
-        # Initialize portfolio values
+        # Preallocate the portfolio value history (initial capital plus one row per trading day)
+        self._allocate_portfolio_values(len(dates) + 1)
         if len(dates) > 0:
-            self.portfolio_values = [{"Date": dates[0], "Portfolio Value": self.initial_capital}]
-        else:
-            self.portfolio_values = []
+            self._record_portfolio_value(dates[0], self.initial_capital)
+
+        # Preallocate one result slot per trading day; skipped days are trimmed at the end
+        backtest_results = [None] * len(dates)
+        result_count = 0
+        # Latest analyst signals, reused on days the graph is skipped
+        analyst_signals = {}
 
-        backtest_results = []
+        # Format all date strings up front rather than once per loop iteration
+        date_strs = dates.strftime("%Y-%m-%d").tolist()
+        lookback_strs = (dates - pd.Timedelta(days=30)).strftime("%Y-%m-%d").tolist()
+        previous_date_strs = (dates - pd.Timedelta(days=1)).strftime("%Y-%m-%d").tolist()
 
         for i, current_date in enumerate(dates):
             # Allow other async operations to run
             await asyncio.sleep(0)
 
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
-            current_date_str = current_date.strftime("%Y-%m-%d")
-            previous_date_str = (current_date - timedelta(days=1)).strftime("%Y-%m-%d")
-
-            if lookback_start == current_date_str:
-                continue
+            lookback_start = lookback_strs[i]
+            current_date_str = date_strs[i]
+            previous_date_str = previous_date_strs[i]
 
             # Send progress update if callback provided
             if progress_callback:
@@ -326,18 +405,18 @@ class BacktestService:
                     "current_step": i + 1,
                 })
 
-            # Get current prices
+            # Get current prices; days without prices are skipped before running the graph
             try:
                 current_prices = {}
                 missing_data = False
 
                 for ticker in self.tickers:
                     try:
-                        price_data = get_price_data(ticker, previous_date_str, current_date_str)
+                        price_data = self._prices[ticker].loc[previous_date_str:current_date_str]
                         if price_data.empty:
                             missing_data = True
                             break
-                        current_prices[ticker] = price_data.iloc[-1]["close"]
+                        current_prices[ticker] = price_data["close"].iat[-1]
                     except Exception as e:
                         missing_data = True
                         break
@@ -348,77 +427,66 @@ class BacktestService:
             except Exception:
                 continue
 
-            # Create portfolio for this iteration
-            portfolio_for_graph = create_portfolio(
-                initial_cash=self.portfolio["cash"],
-                margin_requirement=self.portfolio["margin_requirement"],
-                tickers=self.tickers,
-                portfolio_positions=[]  # We'll handle positions manually
-            )
-            
-            # Copy current portfolio state to the graph portfolio
-            portfolio_for_graph.update(self.portfolio)
-
-            # Execute graph-based agent decisions
-            try:
-                result = await run_graph_async(
-                    graph=self.graph,
-                    portfolio=portfolio_for_graph,
+            # Only run the graph every agent_frequency trading days
+            if result_count % self.agent_frequency == 0:
+                # Create portfolio for this iteration
+                portfolio_for_graph = create_portfolio(
+                    initial_cash=self.portfolio["cash"],
+                    margin_requirement=self.portfolio["margin_requirement"],
                     tickers=self.tickers,
-                    start_date=lookback_start,
-                    end_date=current_date_str,
-                    model_name=self.model_name,
-                    model_provider=self.model_provider,
-                    request=self.request,
+                    portfolio_positions=[]  # We'll handle positions manually
                 )
+            
+                # Copy current portfolio state to the graph portfolio
+                portfolio_for_graph.update(self.portfolio)
+
+                # Execute graph-based agent decisions
+                try:
+                    result = await run_graph_async(
+                        graph=self.graph,
+                        portfolio=portfolio_for_graph,
+                        tickers=self.tickers,
+                        start_date=lookback_start,
+                        end_date=current_date_str,
+                        model_name=self.model_name,
+                        model_provider=self.model_provider,
+                        request=self.request,
+                    )
                 
-                # Parse the decisions from the graph result
-                if result and result.get("messages"):
-                    decisions = parse_hedge_fund_response(result["messages"][-1].content)
-                    analyst_signals = result.get("data", {}).get("analyst_signals", {})
-                else:
+                    # Parse the decisions from the graph result
+                    if result and result.get("messages"):
+                        decisions = parse_hedge_fund_response(result["messages"][-1].content)
+                        analyst_signals = result.get("data", {}).get("analyst_signals", {})
+                    else:
+                        decisions = {}
+                        analyst_signals = {}
+                    
+                except Exception as e:
+                    print(f"Error running graph for {current_date_str}: {e}")
                     decisions = {}
                     analyst_signals = {}
-                    
-            except Exception as e:
-                print(f"Error running graph for {current_date_str}: {e}")
+            else:
+                # Between graph runs, hold all positions and keep reporting the last signals
                 decisions = {}
-                analyst_signals = {}
 
             # Execute trades based on decisions
-            executed_trades = {}
-            for ticker in self.tickers:
-                decision = decisions.get(ticker, {"action": "hold", "quantity": 0})
-                action, quantity = decision.get("action", "hold"), decision.get("quantity", 0)
-                executed_quantity = self.execute_trade(ticker, action, quantity, current_prices[ticker])
-                executed_trades[ticker] = executed_quantity
-
-            # Calculate portfolio value
-            total_value = self.calculate_portfolio_value(current_prices)
+            executed_trades = self.execute_trades(decisions, current_prices)
 
-            # Calculate exposures
-            long_exposure = sum(self.portfolio["positions"][t]["long"] * current_prices[t] for t in self.tickers)
-            short_exposure = sum(self.portfolio["positions"][t]["short"] * current_prices[t] for t in self.tickers)
+            # Calculate exposures and derive the portfolio value from them
+            long_exposure, short_exposure = self.calculate_exposures(current_prices)
+            total_value = self.portfolio["cash"] + long_exposure - short_exposure
             gross_exposure = long_exposure + short_exposure
             net_exposure = long_exposure - short_exposure
             long_short_ratio = long_exposure / short_exposure if short_exposure > 1e-9 else None
 
             # Track portfolio value
-            self.portfolio_values.append({
-                "Date": current_date,
-                "Portfolio Value": total_value,
-                "Long Exposure": long_exposure,
-                "Short Exposure": short_exposure,
-                "Gross Exposure": gross_exposure,
-                "Net Exposure": net_exposure,
-                "Long/Short Ratio": long_short_ratio,
-            })
+            self._record_portfolio_value(current_date, total_value, long_exposure, short_exposure, gross_exposure, net_exposure, long_short_ratio)
 
             # Calculate performance metrics for this day
             portfolio_return = (total_value / self.initial_capital - 1) * 100
             
             # Update performance metrics if we have enough data
-            if len(self.portfolio_values) > 2:
+            if self._value_count > 2:
                 self._update_performance_metrics(performance_metrics)
 
             # Build detailed result for this date (similar to CLI format)
@@ -441,16 +509,19 @@ class BacktestService:
                 "ticker_details": []
             }
 
+            # Count analyst signals for every ticker in one pass, keyed by (ticker, signal)
+            signal_counts = Counter(
+                (ticker, signals[ticker].get("signal", "").lower())
+                for signals in analyst_signals.values()
+                for ticker in self.tickers
+                if ticker in signals
+            )
+
             # Build ticker details (similar to CLI format_backtest_row)
             for ticker in self.tickers:
-                ticker_signals = {}
-                for agent_name, signals in analyst_signals.items():
-                    if ticker in signals:
-                        ticker_signals[agent_name] = signals[ticker]
-
-                bullish_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "bullish"])
-                bearish_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "bearish"])
-                neutral_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "neutral"])
+                bullish_count = signal_counts[(ticker, "bullish")]
+                bearish_count = signal_counts[(ticker, "bearish")]
+                neutral_count = signal_counts[(ticker, "neutral")]
 
                 # Calculate net position value
                 pos = self.portfolio["positions"][ticker]
@@ -478,7 +549,8 @@ class BacktestService:
                 
                 date_result["ticker_details"].append(ticker_detail)
 
-            backtest_results.append(date_result)
+            backtest_results[result_count] = date_result
+            result_count += 1
 
             # Send intermediate result if callback provided
             if progress_callback:
@@ -488,9 +560,11 @@ class BacktestService:
                 })
 
         # Ensure final performance metrics are calculated
-        if len(self.portfolio_values) > 1:
+        if self._value_count > 1:
             self._update_performance_metrics(performance_metrics)
 
+        backtest_results = backtest_results[:result_count]
+
         # Calculate final exposures if we have results
         if backtest_results:
             final_result = backtest_results[-1]
@@ -504,7 +578,7 @@ class BacktestService:
         return {
             "results": backtest_results,
             "performance_metrics": performance_metrics,
-            "portfolio_values": self.portfolio_values,
+            "portfolio_values": self._portfolio_values_records(),
             "final_portfolio": self.portfolio,
         }
 
@@ -523,10 +597,10 @@ class BacktestService:
 
     def analyze_performance(self) -> pd.DataFrame:
         """Analyze performance and return DataFrame with metrics."""
-        if not self.portfolio_values:
+        if self._value_count == 0:
             return pd.DataFrame()
 
-        performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
+        performance_df = self._portfolio_values_df()
         if performance_df.empty:
             return performance_df
 
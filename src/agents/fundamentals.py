@@ -2,10 +2,26 @@ from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.api_key import get_api_key_from_state
 from src.utils.progress import progress
+from collections import Counter
 import json
+import numpy as np
 
 from src.tools.api import get_financial_metrics
 
+# Per-group thresholds: a metric scores a point when it is above its threshold
+PROFITABILITY_THRESHOLDS = np.array([0.15, 0.20, 0.15])  # ROE, net margin, operating margin
+GROWTH_THRESHOLDS = np.array([0.10, 0.10, 0.10])  # Revenue, earnings, book value growth
+PRICE_RATIO_THRESHOLDS = np.array([25, 3, 5])  # P/E, P/B, P/S
+
+
+def threshold_score(values, thresholds: np.ndarray):
+    """
+    Count how many values exceed their thresholds. Missing (None) values never score.
+    Accepts a single row of metrics or a 2-D batch (one row per ticker), in which
+    case a score is returned for each row.
+    """
+    return (np.array(values, dtype=float) > thresholds).sum(axis=-1)
+
 
 ##### Fundamental Agent #####
 def fundamentals_analyst_agent(state: AgentState, agent_id: str = "fundamentals_analyst_agent"):
@@ -46,12 +62,7 @@ def fundamentals_analyst_agent(state: AgentState, agent_id: str = "fundamentals_
         net_margin = metrics.net_margin
         operating_margin = metrics.operating_margin
 
-        thresholds = [
-            (return_on_equity, 0.15),  # Strong ROE above 15%
-            (net_margin, 0.20),  # Healthy profit margins
-            (operating_margin, 0.15),  # Strong operating efficiency
-        ]
-        profitability_score = sum(metric is not None and metric > threshold for metric, threshold in thresholds)
+        profitability_score = threshold_score([return_on_equity, net_margin, operating_margin], PROFITABILITY_THRESHOLDS)
 
         signals.append("bullish" if profitability_score >= 2 else "bearish" if profitability_score == 0 else "neutral")
         reasoning["profitability_signal"] = {
@@ -65,12 +76,7 @@ def fundamentals_analyst_agent(state: AgentState, agent_id: str = "fundamentals_
         earnings_growth = metrics.earnings_growth
         book_value_growth = metrics.book_value_growth
 
-        thresholds = [
-            (revenue_growth, 0.10),  # 10% revenue growth
-            (earnings_growth, 0.10),  # 10% earnings growth
-            (book_value_growth, 0.10),  # 10% book value growth
-        ]
-        growth_score = sum(metric is not None and metric > threshold for metric, threshold in thresholds)
+        growth_score = threshold_score([revenue_growth, earnings_growth, book_value_growth], GROWTH_THRESHOLDS)
 
         signals.append("bullish" if growth_score >= 2 else "bearish" if growth_score == 0 else "neutral")
         reasoning["growth_signal"] = {
@@ -105,12 +111,7 @@ def fundamentals_analyst_agent(state: AgentState, agent_id: str = "fundamentals_
         pb_ratio = metrics.price_to_book_ratio
         ps_ratio = metrics.price_to_sales_ratio
 
-        thresholds = [
-            (pe_ratio, 25),  # Reasonable P/E ratio
-            (pb_ratio, 3),  # Reasonable P/B ratio
-            (ps_ratio, 5),  # Reasonable P/S ratio
-        ]
-        price_ratio_score = sum(metric is not None and metric > threshold for metric, threshold in thresholds)
+        price_ratio_score = threshold_score([pe_ratio, pb_ratio, ps_ratio], PRICE_RATIO_THRESHOLDS)
 
         signals.append("bearish" if price_ratio_score >= 2 else "bullish" if price_ratio_score == 0 else "neutral")
         reasoning["price_ratios_signal"] = {
@@ -120,8 +121,9 @@ def fundamentals_analyst_agent(state: AgentState, agent_id: str = "fundamentals_
 
         progress.update_status(agent_id, ticker, "Calculating final signal")
         # Determine overall signal
-        bullish_signals = signals.count("bullish")
-        bearish_signals = signals.count("bearish")
+        signal_counts = Counter(signals)
+        bullish_signals = signal_counts["bullish"]
+        bearish_signals = signal_counts["bearish"]
 
         if bullish_signals > bearish_signals:
             overall_signal = "bullish"
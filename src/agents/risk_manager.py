@@ -36,7 +36,7 @@ def risk_management_agent(state: AgentState, agent_id: str = "risk_management_ag
         prices_df = prices_to_df(prices)
         
         if not prices_df.empty:
-            current_price = prices_df["close"].iloc[-1]
+            current_price = prices_df["close"].iat[-1]
             current_prices[ticker] = current_price
             progress.update_status(agent_id, ticker, f"Current price: {current_price}")
         else:
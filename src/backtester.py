@@ -1,6 +1,6 @@
 import sys
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import questionary
 
@@ -9,16 +9,18 @@ import pandas as pd
 from colorama import Fore, Style, init
 import numpy as np
 import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from src.llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
 from src.utils.analysts import ANALYST_ORDER
 from src.main import run_hedge_fund
 from src.tools.api import (
     get_company_news,
-    get_price_data,
     get_prices,
     get_financial_metrics,
     get_insider_trades,
+    prices_to_df,
 )
 from src.utils.display import print_backtest_results, format_backtest_row
 from typing_extensions import Callable
@@ -26,6 +28,28 @@ from src.utils.ollama import ensure_ollama_and_model
 
 init(autoreset=True)
 
+# Actions that change the portfolio; anything else (e.g. "hold") is a no-op
+TRADE_ACTIONS = frozenset({"buy", "sell", "short", "cover"})
+
+# Columns tracked for each day in the portfolio value history
+PORTFOLIO_VALUE_COLUMNS = ["Portfolio Value", "Long Exposure", "Short Exposure", "Gross Exposure", "Net Exposure", "Long/Short Ratio"]
+
+# Number of trading days shown while the backtest is running; the full table is printed at the end
+LIVE_DISPLAY_DAYS = 20
+
+
+def _daily_returns(values: np.ndarray) -> np.ndarray:
+    """Simple daily returns of a portfolio value series (one element shorter than the input)."""
+    return values[1:] / values[:-1] - 1.0
+
+
+def _max_drawdown(values: np.ndarray) -> tuple[float, int]:
+    """Return the maximum drawdown (as a negative fraction) and the index at which it occurs."""
+    rolling_max = np.maximum.accumulate(values)
+    drawdown = (values - rolling_max) / rolling_max
+    index = int(drawdown.argmin())
+    return drawdown[index], index
+
 
 class Backtester:
     def __init__(
@@ -39,6 +63,7 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        agent_frequency: int = 1,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -50,6 +75,7 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param agent_frequency: Run the agent every N trading days and hold positions in between (1 = every day).
         """
         self.agent = agent
         self.tickers = tickers
@@ -59,9 +85,17 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        if agent_frequency < 1:
+            raise ValueError(f"agent_frequency must be at least 1, got {agent_frequency}")
+        self.agent_frequency = agent_frequency
+
+        # Daily price frames per ticker, populated by prefetch_data
+        self._prices = {}
+
+        # Portfolio value history, preallocated per trading day when the backtest starts
+        self._allocate_portfolio_values(0)
 
         # Initialize portfolio with support for long/short positions
-        self.portfolio_values = []
         self.portfolio = {
             "cash": initial_capital,
             "margin_used": 0.0,  # total margin usage across all short positions
@@ -240,28 +274,43 @@ class Backtester:
 
         return 0
 
-    def calculate_portfolio_value(self, current_prices):
+    def execute_trades(self, decisions, current_prices):
         """
-        Calculate total portfolio value, including:
-          - cash
-          - market value of long positions
-          - unrealized gains/losses for short positions
+        Execute one date's decisions for every ticker and return the executed quantity per ticker.
+        Trades run sequentially in ticker order because each one changes the cash available to the next;
+        tickers without a trading action are skipped without touching the portfolio.
         """
-        total_value = self.portfolio["cash"]
+        executed_trades = dict.fromkeys(self.tickers, 0)
+        for ticker in self.tickers:
+            decision = decisions.get(ticker)
+            if not decision:
+                continue
+            action = decision.get("action", "hold")
+            if action not in TRADE_ACTIONS:
+                continue
+            executed_trades[ticker] = self.execute_trade(ticker, action, decision.get("quantity", 0), current_prices[ticker])
+        return executed_trades
 
+    def calculate_exposures(self, current_prices):
+        """Return (long_exposure, short_exposure) across all tickers, walking the positions once."""
+        long_exposure = 0.0
+        short_exposure = 0.0
         for ticker in self.tickers:
             position = self.portfolio["positions"][ticker]
             price = current_prices[ticker]
+            long_exposure += position["long"] * price
+            short_exposure += position["short"] * price
+        return long_exposure, short_exposure
 
-            # Long position value
-            long_value = position["long"] * price
-            total_value += long_value
-
-            # Short position unrealized PnL = short_shares * (short_cost_basis - current_price)
-            if position["short"] > 0:
-                total_value -= position["short"] * price
-
-        return total_value
+    def calculate_portfolio_value(self, current_prices):
+        """
+        Calculate total portfolio value, including:
+          - cash
+          - market value of long positions
+          - unrealized gains/losses for short positions
+        """
+        long_exposure, short_exposure = self.calculate_exposures(current_prices)
+        return self.portfolio["cash"] + long_exposure - short_exposure
 
     def prefetch_data(self):
         """Pre-fetch all data needed for the backtest period."""
@@ -269,21 +318,31 @@ class Backtester:
 
         # Convert end_date string to datetime, fetch up to 1 year before
         end_date_dt = datetime.strptime(self.end_date, "%Y-%m-%d")
-        start_date_dt = end_date_dt - relativedelta(years=1)
+        start_date_dt = min(end_date_dt - relativedelta(years=1), datetime.strptime(self.start_date, "%Y-%m-%d"))
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
 
-        for ticker in self.tickers:
+        # The fetches are network-bound, so run them concurrently across all tickers
+        with ThreadPoolExecutor(max_workers=max(1, min(16, 4 * len(self.tickers)))) as executor:
             # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
+            price_futures = {ticker: executor.submit(get_prices, ticker, start_date_str, self.end_date) for ticker in self.tickers}
+            other_futures = []
+            for ticker in self.tickers:
+                # Fetch financial metrics
+                other_futures.append(executor.submit(get_financial_metrics, ticker, self.end_date, limit=10))
 
-            # Fetch financial metrics
-            get_financial_metrics(ticker, self.end_date, limit=10)
+                # Fetch insider trades
+                other_futures.append(executor.submit(get_insider_trades, ticker, self.end_date, start_date=self.start_date, limit=1000))
 
-            # Fetch insider trades
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
+                # Fetch company news
+                other_futures.append(executor.submit(get_company_news, ticker, self.end_date, start_date=self.start_date, limit=1000))
 
-            # Fetch company news
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        # Re-raise any fetch error, then keep prices indexed by date so the
+        # backtest loop can slice them per day
+        for future in other_futures:
+            future.result()
+        for ticker, future in price_futures.items():
+            prices = future.result()
+            self._prices[ticker] = prices_to_df(prices) if prices else pd.DataFrame(columns=["close"], index=pd.DatetimeIndex([]))
 
         print("Data pre-fetch complete.")
 
@@ -292,39 +351,47 @@ class Backtester:
         self.prefetch_data()
 
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
-        table_rows = []
+        # Preallocate the table: one row per ticker plus a summary row for each trading day
+        rows_per_day = len(self.tickers) + 1
+        table_rows = [None] * (len(dates) * rows_per_day)
+        row_count = 0
         performance_metrics = {"sharpe_ratio": None, "sortino_ratio": None, "max_drawdown": None, "long_short_ratio": None, "gross_exposure": None, "net_exposure": None}
 
         print("\nStarting backtest...")
 
-        # Initialize portfolio values list with initial capital
+        # Trading days processed so far, and the latest analyst signals for days the agent is skipped
+        trading_days = 0
+        analyst_signals = {}
+
+        # Preallocate the portfolio value history (initial capital plus one row per trading day)
+        self._allocate_portfolio_values(len(dates) + 1)
         if len(dates) > 0:
-            self.portfolio_values = [{"Date": dates[0], "Portfolio Value": self.initial_capital}]
-        else:
-            self.portfolio_values = []
+            self._record_portfolio_value(dates[0], self.initial_capital)
 
-        for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
-            current_date_str = current_date.strftime("%Y-%m-%d")
-            previous_date_str = (current_date - timedelta(days=1)).strftime("%Y-%m-%d")
+        # Format all date strings up front rather than once per loop iteration
+        date_strs = dates.strftime("%Y-%m-%d").tolist()
+        lookback_strs = (dates - pd.Timedelta(days=30)).strftime("%Y-%m-%d").tolist()
+        previous_date_strs = (dates - pd.Timedelta(days=1)).strftime("%Y-%m-%d").tolist()
 
-            # Skip if there's no prior day to look back (i.e., first date in the range)
-            if lookback_start == current_date_str:
-                continue
+        for i, current_date in enumerate(dates):
+            lookback_start = lookback_strs[i]
+            current_date_str = date_strs[i]
+            previous_date_str = previous_date_strs[i]
 
-            # Get current prices for all tickers
+            # Get current prices for all tickers; days without prices (holidays, gaps) are
+            # skipped here, before any agent work is done
             try:
                 current_prices = {}
                 missing_data = False
 
                 for ticker in self.tickers:
                     try:
-                        price_data = get_price_data(ticker, previous_date_str, current_date_str)
+                        price_data = self._prices[ticker].loc[previous_date_str:current_date_str]
                         if price_data.empty:
                             print(f"Warning: No price data for {ticker} on {current_date_str}")
                             missing_data = True
                             break
-                        current_prices[ticker] = price_data.iloc[-1]["close"]
+                        current_prices[ticker] = price_data["close"].iat[-1]
                     except Exception as e:
                         print(f"Error fetching price for {ticker} between {previous_date_str} and {current_date_str}: {e}")
                         missing_data = True
@@ -342,44 +409,41 @@ class Backtester:
             # ---------------------------------------------------------------
             # 1) Execute the agent's trades
             # ---------------------------------------------------------------
-            output = self.agent(
-                tickers=self.tickers,
-                start_date=lookback_start,
-                end_date=current_date_str,
-                portfolio=self.portfolio,
-                model_name=self.model_name,
-                model_provider=self.model_provider,
-                selected_analysts=self.selected_analysts,
-            )
-            decisions = output["decisions"]
-            analyst_signals = output["analyst_signals"]
+            if trading_days % self.agent_frequency == 0:
+                output = self.agent(
+                    tickers=self.tickers,
+                    start_date=lookback_start,
+                    end_date=current_date_str,
+                    portfolio=self.portfolio,
+                    model_name=self.model_name,
+                    model_provider=self.model_provider,
+                    selected_analysts=self.selected_analysts,
+                )
+                decisions = output["decisions"]
+                analyst_signals = output["analyst_signals"]
+            else:
+                # Between agent runs, hold all positions and keep showing the last signals
+                decisions = {}
+            trading_days += 1
 
             # Execute trades for each ticker
-            executed_trades = {}
-            for ticker in self.tickers:
-                decision = decisions.get(ticker, {"action": "hold", "quantity": 0})
-                action, quantity = decision.get("action", "hold"), decision.get("quantity", 0)
-
-                executed_quantity = self.execute_trade(ticker, action, quantity, current_prices[ticker])
-                executed_trades[ticker] = executed_quantity
+            executed_trades = self.execute_trades(decisions, current_prices)
 
             # ---------------------------------------------------------------
             # 2) Now that trades have executed trades, recalculate the final
             #    portfolio value for this day.
             # ---------------------------------------------------------------
-            total_value = self.calculate_portfolio_value(current_prices)
-
-            # Also compute long/short exposures for final post‐trade state
-            long_exposure = sum(self.portfolio["positions"][t]["long"] * current_prices[t] for t in self.tickers)
-            short_exposure = sum(self.portfolio["positions"][t]["short"] * current_prices[t] for t in self.tickers)
+            # Compute long/short exposures for final post‐trade state, then derive the total from them
+            long_exposure, short_exposure = self.calculate_exposures(current_prices)
+            total_value = self.portfolio["cash"] + long_exposure - short_exposure
 
             # Calculate gross and net exposures
             gross_exposure = long_exposure + short_exposure
             net_exposure = long_exposure - short_exposure
             long_short_ratio = long_exposure / short_exposure if short_exposure > 1e-9 else float("inf")
 
-            # Track each day's portfolio value in self.portfolio_values
-            self.portfolio_values.append({"Date": current_date, "Portfolio Value": total_value, "Long Exposure": long_exposure, "Short Exposure": short_exposure, "Gross Exposure": gross_exposure, "Net Exposure": net_exposure, "Long/Short Ratio": long_short_ratio})
+            # Track each day's portfolio value in the preallocated history
+            self._record_portfolio_value(current_date, total_value, long_exposure, short_exposure, gross_exposure, net_exposure, long_short_ratio)
 
             # ---------------------------------------------------------------
             # 3) Build the table rows to display
@@ -393,9 +457,10 @@ class Backtester:
                     if ticker in signals:
                         ticker_signals[agent_name] = signals[ticker]
 
-                bullish_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "bullish"])
-                bearish_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "bearish"])
-                neutral_count = len([s for s in ticker_signals.values() if s.get("signal", "").lower() == "neutral"])
+                signal_counts = Counter(s.get("signal", "").lower() for s in ticker_signals.values())
+                bullish_count = signal_counts["bullish"]
+                bearish_count = signal_counts["bearish"]
+                neutral_count = signal_counts["neutral"]
 
                 # Calculate net position value
                 pos = self.portfolio["positions"][ticker]
@@ -453,31 +518,59 @@ class Backtester:
                 ),
             )
 
-            table_rows.extend(date_rows)
-            print_backtest_results(table_rows)
+            table_rows[row_count : row_count + rows_per_day] = date_rows
+            row_count += rows_per_day
+            print_backtest_results(table_rows[max(0, row_count - LIVE_DISPLAY_DAYS * rows_per_day) : row_count])
 
             # Update performance metrics if we have enough data
-            if len(self.portfolio_values) > 3:
+            if self._value_count > 3:
                 self._update_performance_metrics(performance_metrics)
 
+        # Print the complete table once the backtest has finished
+        table_rows = table_rows[:row_count]
+        if table_rows:
+            print_backtest_results(table_rows)
+
         # Store the final performance metrics for reference in analyze_performance
         self.performance_metrics = performance_metrics
         return performance_metrics
 
+    def _allocate_portfolio_values(self, capacity: int):
+        """Start an empty portfolio value history with room for `capacity` days."""
+        self._value_dates = np.empty(capacity, dtype="datetime64[ns]")
+        self._values = np.full((capacity, len(PORTFOLIO_VALUE_COLUMNS)), np.nan)
+        self._value_count = 0
+
+    def _record_portfolio_value(self, date, *values):
+        """Store one day's portfolio value (and optionally its exposures) in the preallocated history."""
+        self._value_dates[self._value_count] = date
+        self._values[self._value_count, : len(values)] = values
+        self._value_count += 1
+
+    def _portfolio_values_df(self) -> pd.DataFrame:
+        """Return the portfolio value history recorded so far, indexed by date."""
+        n = self._value_count
+        return pd.DataFrame(self._values[:n], index=pd.DatetimeIndex(self._value_dates[:n], name="Date"), columns=PORTFOLIO_VALUE_COLUMNS)
+
+    @property
+    def portfolio_values(self) -> list[dict]:
+        """Portfolio value history as a list of records, one per recorded day."""
+        return self._portfolio_values_df().reset_index().to_dict("records")
+
     def _update_performance_metrics(self, performance_metrics):
         """Helper method to update performance metrics using daily returns."""
-        values_df = pd.DataFrame(self.portfolio_values).set_index("Date")
-        values_df["Daily Return"] = values_df["Portfolio Value"].pct_change()
-        clean_returns = values_df["Daily Return"].dropna()
+        # Work on the raw value array rather than building a DataFrame every day
+        values = self._values[: self._value_count, 0]
+        clean_returns = _daily_returns(values)
 
-        if len(clean_returns) < 2:
+        if clean_returns.size < 2:
             return  # not enough data points
 
         # Assumes 252 trading days/year
         daily_risk_free_rate = 0.0434 / 252
         excess_returns = clean_returns - daily_risk_free_rate
         mean_excess_return = excess_returns.mean()
-        std_excess_return = excess_returns.std()
+        std_excess_return = excess_returns.std(ddof=1)
 
         # Sharpe ratio
         if std_excess_return > 1e-12:
@@ -487,8 +580,9 @@ class Backtester:
 
         # Sortino ratio
         negative_returns = excess_returns[excess_returns < 0]
-        if len(negative_returns) > 0:
-            downside_std = negative_returns.std()
+        if negative_returns.size > 0:
+            # A single negative return has no sample std (NaN), same as pandas
+            downside_std = negative_returns.std(ddof=1) if negative_returns.size > 1 else np.nan
             if downside_std > 1e-12:
                 performance_metrics["sortino_ratio"] = np.sqrt(252) * (mean_excess_return / downside_std)
             else:
@@ -497,36 +591,28 @@ class Backtester:
             performance_metrics["sortino_ratio"] = float("inf") if mean_excess_return > 0 else 0
 
         # Maximum drawdown (ensure it's stored as a negative percentage)
-        rolling_max = values_df["Portfolio Value"].cummax()
-        drawdown = (values_df["Portfolio Value"] - rolling_max) / rolling_max
-
-        if len(drawdown) > 0:
-            min_drawdown = drawdown.min()
-            # Store as a negative percentage
-            performance_metrics["max_drawdown"] = min_drawdown * 100
+        min_drawdown, min_drawdown_index = _max_drawdown(values)
+        performance_metrics["max_drawdown"] = min_drawdown * 100
 
-            # Store the date of max drawdown for reference
-            if min_drawdown < 0:
-                performance_metrics["max_drawdown_date"] = drawdown.idxmin().strftime("%Y-%m-%d")
-            else:
-                performance_metrics["max_drawdown_date"] = None
+        # Store the date of max drawdown for reference
+        if min_drawdown < 0:
+            performance_metrics["max_drawdown_date"] = pd.Timestamp(self._value_dates[min_drawdown_index]).strftime("%Y-%m-%d")
         else:
-            performance_metrics["max_drawdown"] = 0.0
             performance_metrics["max_drawdown_date"] = None
 
     def analyze_performance(self):
         """Creates a performance DataFrame, prints summary stats, and plots equity curve."""
-        if not self.portfolio_values:
+        if self._value_count == 0:
             print("No portfolio data found. Please run the backtest first.")
             return pd.DataFrame()
 
-        performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
+        performance_df = self._portfolio_values_df()
         if performance_df.empty:
             print("No valid performance data to analyze.")
             return performance_df
 
-        final_portfolio_value = performance_df["Portfolio Value"].iloc[-1]
-        total_return = ((final_portfolio_value - self.initial_capital) / self.initial_capital) * 100
+        values = performance_df["Portfolio Value"].to_numpy()
+        total_return = ((values[-1] - self.initial_capital) / self.initial_capital) * 100
 
         print(f"\n{Fore.WHITE}{Style.BRIGHT}PORTFOLIO PERFORMANCE SUMMARY:{Style.RESET_ALL}")
         print(f"Total Return: {Fore.GREEN if total_return >= 0 else Fore.RED}{total_return:.2f}%{Style.RESET_ALL}")
@@ -544,11 +630,12 @@ class Backtester:
         plt.grid(True)
         plt.show()
 
-        # Compute daily returns
-        performance_df["Daily Return"] = performance_df["Portfolio Value"].pct_change().fillna(0)
+        # Compute daily returns (the first day counts as 0, like pct_change().fillna(0))
+        daily_returns = np.concatenate(([0.0], _daily_returns(values)))
+        performance_df["Daily Return"] = daily_returns
         daily_rf = 0.0434 / 252  # daily risk-free rate
-        mean_daily_return = performance_df["Daily Return"].mean()
-        std_daily_return = performance_df["Daily Return"].std()
+        mean_daily_return = daily_returns.mean()
+        std_daily_return = daily_returns.std(ddof=1) if daily_returns.size > 1 else np.nan
 
         # Annualized Sharpe Ratio
         if std_daily_return != 0:
@@ -563,10 +650,9 @@ class Backtester:
 
         # If no value exists yet, calculate it
         if max_drawdown is None:
-            rolling_max = performance_df["Portfolio Value"].cummax()
-            drawdown = (performance_df["Portfolio Value"] - rolling_max) / rolling_max
-            max_drawdown = drawdown.min() * 100
-            max_drawdown_date = drawdown.idxmin().strftime("%Y-%m-%d") if pd.notnull(drawdown.idxmin()) else None
+            min_drawdown, min_drawdown_index = _max_drawdown(values)
+            max_drawdown = min_drawdown * 100
+            max_drawdown_date = performance_df.index[min_drawdown_index].strftime("%Y-%m-%d")
 
         if max_drawdown_date:
             print(f"Maximum Drawdown: {Fore.RED}{abs(max_drawdown):.2f}%{Style.RESET_ALL} (on {max_drawdown_date})")
@@ -609,6 +695,12 @@ class Backtester:
 if __name__ == "__main__":
     import argparse
 
+    def positive_int(value: str) -> int:
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+        return number
+
     parser = argparse.ArgumentParser(description="Run backtesting simulation")
     parser.add_argument(
         "--tickers",
@@ -652,6 +744,12 @@ if __name__ == "__main__":
         help="Use all available analysts (overrides --analysts)",
     )
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
+    parser.add_argument(
+        "--agent-frequency",
+        type=positive_int,
+        default=1,
+        help="Run the agents every N trading days and hold positions in between (default: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -770,6 +868,7 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        agent_frequency=args.agent_frequency,
     )
 
     performance_metrics = backtester.run_backtest()
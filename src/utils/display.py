@@ -304,6 +304,16 @@ def print_backtest_results(table_rows: list) -> None:
     print("\n" * 4)
 
 
+# Colors for each trade action in the backtest table
+BACKTEST_ACTION_COLORS = {
+    "BUY": Fore.GREEN,
+    "COVER": Fore.GREEN,
+    "SELL": Fore.RED,
+    "SHORT": Fore.RED,
+    "HOLD": Fore.WHITE,
+}
+
+
 def format_backtest_row(
     date: str,
     ticker: str,
@@ -326,13 +336,8 @@ def format_backtest_row(
 ) -> list[any]:
     """Format a row for the backtest results table"""
     # Color the action
-    action_color = {
-        "BUY": Fore.GREEN,
-        "COVER": Fore.GREEN,
-        "SELL": Fore.RED,
-        "SHORT": Fore.RED,
-        "HOLD": Fore.WHITE,
-    }.get(action.upper(), Fore.WHITE)
+    action = action.upper()
+    action_color = BACKTEST_ACTION_COLORS.get(action, Fore.WHITE)
 
     if is_summary:
         return_color = Fore.GREEN if return_pct >= 0 else Fore.RED
@@ -355,7 +360,7 @@ def format_backtest_row(
         return [
             date,
             f"{Fore.CYAN}{ticker}{Style.RESET_ALL}",
-            f"{action_color}{action.upper()}{Style.RESET_ALL}",
+            f"{action_color}{action}{Style.RESET_ALL}",
             f"{action_color}{quantity:,.0f}{Style.RESET_ALL}",
             f"{Fore.WHITE}{price:,.2f}{Style.RESET_ALL}",
             f"{Fore.WHITE}{shares_owned:,.0f}{Style.RESET_ALL}",
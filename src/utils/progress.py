@@ -89,11 +89,12 @@ class AgentProgress:
         for agent_name, info in sorted(self.agent_status.items(), key=sort_key):
             status = info["status"]
             ticker = info["ticker"]
+            status_lower = status.lower()
             # Create the status text with appropriate styling
-            if status.lower() == "done":
+            if status_lower == "done":
                 style = Style(color="green", bold=True)
                 symbol = "✓"
-            elif status.lower() == "error":
+            elif status_lower == "error":
                 style = Style(color="red", bold=True)
                 symbol = "✗"
             else:
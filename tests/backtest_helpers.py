@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+
+# Value series covering random walks, a single negative return (NaN downside std), a flat run and a new high at the end
+PERFORMANCE_SERIES = [
+    pytest.param(list(100000.0 * np.cumprod(1 + np.random.default_rng(seed).normal(0.0005, 0.01, 120))), id=f"random-{seed}")
+    for seed in range(5)
+] + [
+    pytest.param([100.0, 101.0, 102.0, 101.5, 103.0], id="single-negative-return"),
+    pytest.param([100.0, 100.0, 100.0, 100.0], id="flat"),
+    pytest.param([100.0, 90.0, 95.0, 120.0], id="recovers-to-new-high"),
+]
+
+
+def pandas_performance_metrics(dates: pd.DatetimeIndex, values: list[float], no_downside_sortino) -> dict:
+    """Reference metrics computed with the original pandas formulas.
+
+    :param no_downside_sortino: Sortino ratio reported for a positive mean excess return with no downside deviation.
+    """
+    values_df = pd.DataFrame({"Date": dates, "Portfolio Value": values}).set_index("Date")
+    clean_returns = values_df["Portfolio Value"].pct_change().dropna()
+    metrics = {}
+
+    excess_returns = clean_returns - 0.0434 / 252
+    mean_excess_return = excess_returns.mean()
+    std_excess_return = excess_returns.std()
+    metrics["sharpe_ratio"] = np.sqrt(252) * (mean_excess_return / std_excess_return) if std_excess_return > 1e-12 else 0.0
+
+    negative_returns = excess_returns[excess_returns < 0]
+    downside_std = negative_returns.std() if len(negative_returns) > 0 else np.nan
+    if downside_std > 1e-12:
+        metrics["sortino_ratio"] = np.sqrt(252) * (mean_excess_return / downside_std)
+    else:
+        metrics["sortino_ratio"] = no_downside_sortino if mean_excess_return > 0 else 0
+
+    rolling_max = values_df["Portfolio Value"].cummax()
+    drawdown = (values_df["Portfolio Value"] - rolling_max) / rolling_max
+    metrics["max_drawdown"] = drawdown.min() * 100
+    metrics["max_drawdown_date"] = drawdown.idxmin().strftime("%Y-%m-%d") if drawdown.min() < 0 else None
+    return metrics
+
+
+def recorded_performance_metrics(backtest, dates: pd.DatetimeIndex, values: list[float]) -> dict:
+    """Metrics from a backtest's _update_performance_metrics after recording the given value history."""
+    backtest._allocate_portfolio_values(len(values))
+    for date, value in zip(dates, values):
+        backtest._record_portfolio_value(date, value)
+
+    metrics = {}
+    backtest._update_performance_metrics(metrics)
+    return metrics
+
+
+def assert_metrics_match(metrics: dict, expected: dict):
+    """Assert that two metric dicts have the same keys and (approximately) equal values."""
+    assert metrics.keys() == expected.keys()
+    for key, value in expected.items():
+        assert metrics[key] == (pytest.approx(value, rel=1e-12) if isinstance(value, float) else value), key
@@ -0,0 +1,23 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+
+def make_prices(start_date: str, end_date: str) -> pd.DataFrame:
+    """Build a daily close series with a rising trend for the business days in range."""
+    index = pd.date_range(start_date, end_date, freq="B")
+    return pd.DataFrame({"close": np.linspace(100.0, 120.0, len(index))}, index=index)
+
+
+@pytest.fixture
+def synthetic_prices():
+    """Return a function that replaces a backtest's prefetch_data with synthetic prices for its tickers and date range."""
+
+    def install(backtest):
+        def fake_prefetch():
+            backtest._prices = {ticker: make_prices(backtest.start_date, backtest.end_date) for ticker in backtest.tickers}
+
+        backtest.prefetch_data = fake_prefetch
+        return backtest
+
+    return install
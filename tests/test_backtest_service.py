@@ -0,0 +1,136 @@
+import json
+import math
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, patch
+from langchain_core.messages import HumanMessage
+
+from app.backend.services.backtest_service import BacktestService
+from app.backend.services.portfolio import create_portfolio
+from tests.backtest_helpers import PERFORMANCE_SERIES, assert_metrics_match, pandas_performance_metrics, recorded_performance_metrics
+
+
+def make_service(tickers: list[str], start_date: str, end_date: str, **kwargs) -> BacktestService:
+    """Create a BacktestService with an empty portfolio and 100000 of initial capital."""
+    portfolio = create_portfolio(initial_cash=100000.0, margin_requirement=0.0, tickers=tickers)
+    return BacktestService(graph=None, portfolio=portfolio, tickers=tickers, start_date=start_date, end_date=end_date, initial_capital=100000.0, **kwargs)
+
+
+class TestBacktestService:
+    """Test suite for BacktestService results."""
+
+    @patch("app.backend.services.backtest_service.run_graph_async", new_callable=AsyncMock)
+    def test_portfolio_values_serialise_to_json(self, mock_run_graph, synthetic_prices):
+        """Test that portfolio_values records contain no NaN and serialise as strict JSON."""
+        mock_run_graph.return_value = None
+        service = synthetic_prices(make_service(["AAPL"], "2024-01-02", "2024-01-31"))
+
+        result = service.run_backtest_sync()
+        records = result["portfolio_values"]
+
+        # The initial capital record has no exposures; they are reported as None
+        assert records[0]["Portfolio Value"] == 100000.0
+        assert records[0]["Long Exposure"] is None
+        # No short positions, so the long/short ratio is None rather than NaN
+        assert all(record["Long/Short Ratio"] is None for record in records)
+
+        json.dumps(records, allow_nan=False, default=str)
+
+    @patch("app.backend.services.backtest_service.run_graph_async", new_callable=AsyncMock)
+    def test_portfolio_values_property_matches_result(self, mock_run_graph, synthetic_prices):
+        """Test that the portfolio_values attribute exposes the same records as the backtest result."""
+        mock_run_graph.return_value = None
+        service = synthetic_prices(make_service(["AAPL"], "2024-01-02", "2024-01-31"))
+
+        result = service.run_backtest_sync()
+
+        assert service.portfolio_values == result["portfolio_values"]
+        assert len(service.portfolio_values) == len(result["results"]) + 1
+
+    @patch("app.backend.services.backtest_service.run_graph_async", new_callable=AsyncMock)
+    def test_flat_days_keep_exact_portfolio_value(self, mock_run_graph, synthetic_prices):
+        """Test that days without positions report exactly the initial capital and a zero return."""
+        mock_run_graph.return_value = None
+        service = synthetic_prices(make_service(["AAPL", "MSFT", "NVDA"], "2024-01-02", "2024-01-31"))
+
+        result = service.run_backtest_sync()
+
+        assert all(day["portfolio_value"] == 100000.0 and day["portfolio_return"] == 0.0 for day in result["results"])
+
+    @patch("app.backend.services.backtest_service.run_graph_async", new_callable=AsyncMock)
+    def test_counts_analyst_signals_per_ticker(self, mock_run_graph, synthetic_prices):
+        """Test that ticker details count each ticker's analyst signals case-insensitively."""
+        mock_run_graph.return_value = {
+            "messages": [HumanMessage(content=json.dumps({}))],
+            "data": {
+                "analyst_signals": {
+                    "agent_a": {"AAPL": {"signal": "Bullish"}, "MSFT": {"signal": "bearish"}},
+                    "agent_b": {"AAPL": {"signal": "bullish"}, "MSFT": {"signal": "neutral"}},
+                    "agent_c": {"AAPL": {"signal": "bearish"}},
+                    "risk_management_agent": {"AAPL": {"remaining_position_limit": 1000.0}},
+                }
+            },
+        }
+        service = synthetic_prices(make_service(["AAPL", "MSFT"], "2024-01-02", "2024-01-05"))
+
+        result = service.run_backtest_sync()
+        details = {detail["ticker"]: detail for detail in result["results"][0]["ticker_details"]}
+
+        assert (details["AAPL"]["bullish_count"], details["AAPL"]["bearish_count"], details["AAPL"]["neutral_count"]) == (2, 1, 0)
+        assert (details["MSFT"]["bullish_count"], details["MSFT"]["bearish_count"], details["MSFT"]["neutral_count"]) == (0, 1, 1)
+
+    @pytest.mark.parametrize("agent_frequency", [1, 5, 7])
+    def test_graph_runs_every_n_trading_days(self, synthetic_prices, agent_frequency):
+        """Test that the graph runs on ceil(days / N) trading days, holding positions and signals in between."""
+        calls = []
+
+        async def fake_run_graph(portfolio, end_date, **kwargs):
+            calls.append((end_date, portfolio["positions"]["AAPL"]["long"]))
+            return {
+                "messages": [HumanMessage(content=json.dumps({"AAPL": {"action": "buy", "quantity": 10}}))],
+                "data": {"analyst_signals": {"agent_a": {"AAPL": {"signal": "bullish", "call": len(calls)}}}},
+            }
+
+        service = synthetic_prices(make_service(["AAPL"], "2024-01-02", "2024-03-29", agent_frequency=agent_frequency))
+        with patch("app.backend.services.backtest_service.run_graph_async", side_effect=fake_run_graph):
+            result = service.run_backtest_sync()
+
+        trading_days = pd.date_range("2024-01-02", "2024-03-29", freq="B").strftime("%Y-%m-%d").tolist()
+        assert len(calls) == math.ceil(len(trading_days) / agent_frequency)
+        # The graph runs on the first trading day and then every N trading days
+        assert [end_date for end_date, _ in calls] == trading_days[::agent_frequency]
+        # Each run sees only the shares bought by earlier runs, so nothing traded in between
+        assert [long for _, long in calls] == [10 * i for i in range(len(calls))]
+        assert service.portfolio["positions"]["AAPL"]["long"] == 10 * len(calls)
+
+        for i, day in enumerate(result["results"]):
+            # Skipped days hold and keep reporting the signals from the latest graph run
+            assert day["analyst_signals"]["agent_a"]["AAPL"]["call"] == i // agent_frequency + 1
+            assert day["ticker_details"][0]["bullish_count"] == 1
+            if i % agent_frequency:
+                assert day["decisions"] == {} and day["executed_trades"]["AAPL"] == 0
+
+    @pytest.mark.parametrize("values", PERFORMANCE_SERIES)
+    def test_performance_metrics_match_pandas(self, values):
+        """Test that the NumPy performance metrics match the original pandas formulas."""
+        dates = pd.date_range("2024-01-02", periods=len(values), freq="B")
+        service = make_service(["AAPL"], "2024-01-02", "2024-01-31")
+
+        metrics = recorded_performance_metrics(service, dates, values)
+        expected = pandas_performance_metrics(dates, values, no_downside_sortino=None)
+
+        assert_metrics_match(metrics, expected)
+
+    def test_single_negative_return_sortino(self):
+        """Test that one negative excess return (NaN downside std) reports no Sortino ratio, as pandas did."""
+        values = [100.0, 101.0, 102.0, 101.5, 103.0]
+        dates = pd.date_range("2024-01-02", periods=len(values), freq="B")
+        service = make_service(["AAPL"], "2024-01-02", "2024-01-31")
+
+        metrics = recorded_performance_metrics(service, dates, values)
+
+        assert metrics["sortino_ratio"] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
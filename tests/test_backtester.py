@@ -0,0 +1,96 @@
+import math
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+from src.backtester import PORTFOLIO_VALUE_COLUMNS, Backtester
+from tests.backtest_helpers import PERFORMANCE_SERIES, assert_metrics_match, pandas_performance_metrics, recorded_performance_metrics
+
+
+class StubAgent:
+    """Agent that buys a fixed quantity on every call and records the positions it was shown."""
+
+    def __init__(self, ticker: str, quantity: int):
+        self.ticker = ticker
+        self.quantity = quantity
+        self.calls = []
+
+    def __call__(self, tickers, start_date, end_date, portfolio, **kwargs):
+        self.calls.append((end_date, portfolio["positions"][self.ticker]["long"]))
+        return {
+            "decisions": {self.ticker: {"action": "buy", "quantity": self.quantity}},
+            "analyst_signals": {},
+        }
+
+
+def make_backtester(agent, tickers: list[str], start_date: str, end_date: str, **kwargs) -> Backtester:
+    """Create a Backtester with 100000 of initial capital."""
+    return Backtester(agent=agent, tickers=tickers, start_date=start_date, end_date=end_date, initial_capital=100000.0, **kwargs)
+
+
+@patch("src.backtester.print_backtest_results")
+class TestBacktester:
+    """Test suite for Backtester runs."""
+
+    @pytest.mark.parametrize("agent_frequency", [1, 5, 7])
+    def test_agent_runs_every_n_trading_days(self, mock_print, synthetic_prices, agent_frequency):
+        """Test that the agent runs on ceil(days / N) trading days and positions are held in between."""
+        agent = StubAgent("AAPL", quantity=10)
+        backtester = synthetic_prices(make_backtester(agent, ["AAPL"], "2024-01-02", "2024-03-29", agent_frequency=agent_frequency))
+
+        backtester.run_backtest()
+
+        trading_days = pd.date_range("2024-01-02", "2024-03-29", freq="B").strftime("%Y-%m-%d").tolist()
+        assert len(agent.calls) == math.ceil(len(trading_days) / agent_frequency)
+        # The agent is called on the first trading day and then every N trading days
+        assert [end_date for end_date, _ in agent.calls] == trading_days[::agent_frequency]
+        # Each call sees only the shares bought by earlier calls, so nothing traded in between
+        assert [long for _, long in agent.calls] == [10 * i for i in range(len(agent.calls))]
+        assert backtester.portfolio["positions"]["AAPL"]["long"] == 10 * len(agent.calls)
+
+    def test_portfolio_values_records_each_trading_day(self, mock_print, synthetic_prices):
+        """Test that portfolio_values lists the initial capital and then one record per trading day."""
+        backtester = synthetic_prices(make_backtester(StubAgent("AAPL", quantity=10), ["AAPL"], "2024-01-02", "2024-01-31"))
+
+        backtester.run_backtest()
+        records = backtester.portfolio_values
+
+        assert len(records) == len(pd.date_range("2024-01-02", "2024-01-31", freq="B")) + 1
+        assert records[0]["Date"] == pd.Timestamp("2024-01-02")
+        assert records[0]["Portfolio Value"] == 100000.0
+        assert list(records[-1]) == ["Date", *PORTFOLIO_VALUE_COLUMNS]
+
+    @pytest.mark.parametrize("agent_frequency", [0, -1])
+    def test_rejects_agent_frequency_below_one(self, mock_print, agent_frequency):
+        """Test that an agent frequency below 1 is rejected rather than coerced."""
+        with pytest.raises(ValueError):
+            Backtester(agent=StubAgent("AAPL", quantity=10), tickers=["AAPL"], start_date="2024-01-02", end_date="2024-01-31", initial_capital=100000.0, agent_frequency=agent_frequency)
+
+
+class TestBacktesterPerformanceMetrics:
+    """Test suite for the backtester's performance metrics."""
+
+    @pytest.mark.parametrize("values", PERFORMANCE_SERIES)
+    def test_performance_metrics_match_pandas(self, values):
+        """Test that the NumPy performance metrics match the original pandas formulas."""
+        dates = pd.date_range("2024-01-02", periods=len(values), freq="B")
+        backtester = make_backtester(StubAgent("AAPL", quantity=10), ["AAPL"], "2024-01-02", "2024-01-31")
+
+        metrics = recorded_performance_metrics(backtester, dates, values)
+        expected = pandas_performance_metrics(dates, values, no_downside_sortino=float("inf"))
+
+        assert_metrics_match(metrics, expected)
+
+    def test_single_negative_return_sortino(self):
+        """Test that one negative excess return (NaN downside std) reports an infinite Sortino ratio, as pandas did."""
+        values = [100.0, 101.0, 102.0, 101.5, 103.0]
+        dates = pd.date_range("2024-01-02", periods=len(values), freq="B")
+        backtester = make_backtester(StubAgent("AAPL", quantity=10), ["AAPL"], "2024-01-02", "2024-01-31")
+
+        metrics = recorded_performance_metrics(backtester, dates, values)
+
+        assert metrics["sortino_ratio"] == float("inf")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])